@@ -1,5 +1,7 @@
 // StarryPad Simon Says – Web UI
 
+const TOP_N = 5;
+
 const promptEl = document.getElementById("prompt");
 const scoreLabel = document.getElementById("scoreLabel");
 const gridEl = document.getElementById("grid");
@@ -12,8 +14,11 @@ const nameInput = document.getElementById("nameInput");
 const nameSubmit = document.getElementById("nameSubmit");
 
 let ws = null;
+const decoder = new TextDecoder();
 let phase = "idle";
 let pendingScore = 0;
+let leaderboard = [];
+let leaderboardVersion = 0;
 
 // ── Helpers ──────────────────────────────────────────────
 
@@ -112,6 +117,7 @@ function send(obj) {
 function connect() {
   const protocol = location.protocol === "https:" ? "wss:" : "ws:";
   ws = new WebSocket(`${protocol}//${location.host}/ws`);
+  ws.binaryType = "arraybuffer";
 
   ws.onopen = () => {
     phase = "idle";
@@ -130,49 +136,72 @@ function connect() {
 
   ws.onmessage = (event) => {
     let data;
-    try { data = JSON.parse(event.data); } catch { return; }
+    const text = typeof event.data === "string" ? event.data : decoder.decode(event.data);
+    try { data = JSON.parse(text); } catch { return; }
 
-    switch (data.type) {
-      case "light":
-        lightPad(data.pad);
-        break;
-      case "unlight":
-        unlightPad(data.pad);
-        break;
-      case "score":
-        setScore(data.score);
-        break;
-      case "phase":
-        phase = data.phase;
-        if (phase === "playing") setPrompt("Watch…");
-        else if (phase === "input") setPrompt("Your turn", true);
-        else if (phase === "idle") setPrompt("Press Start to play", true);
-        updateButtons();
-        break;
-      case "gameover":
-        phase = "gameover";
-        setPrompt(`Game over!`, false);
-        updateButtons();
-        if (data.is_top5) {
-          showNameModal(data.score);
-        }
-        break;
-      case "correct":
-        flashPad(data.pad, "good", 250);
-        break;
-      case "wrong":
-        flashPad(data.pad, "bad", 600);
-        break;
-      case "leaderboard":
-        renderLeaderboard(data.board);
-        break;
-      case "error":
-        setPrompt(data.text);
-        break;
+    if (data.type === "batch") {
+      data.events.forEach(handleMessage);
+    } else {
+      handleMessage(data);
     }
   };
 }
 
+function handleMessage(data) {
+  switch (data.type) {
+    case "light":
+      lightPad(data.pad);
+      break;
+    case "unlight":
+      unlightPad(data.pad);
+      break;
+    case "score":
+      setScore(data.score);
+      break;
+    case "phase":
+      phase = data.phase;
+      if (phase === "playing") setPrompt("Watch…");
+      else if (phase === "input") setPrompt("Your turn", true);
+      else if (phase === "idle") setPrompt("Press Start to play", true);
+      updateButtons();
+      break;
+    case "gameover":
+      phase = "gameover";
+      setPrompt(`Game over!`, false);
+      updateButtons();
+      if (data.is_top5) {
+        showNameModal(data.score);
+      }
+      break;
+    case "correct":
+      flashPad(data.pad, "good", 250);
+      break;
+    case "wrong":
+      flashPad(data.pad, "bad", 600);
+      break;
+    case "leaderboard":
+      leaderboard = data.board || [];
+      leaderboardVersion = data.version;
+      renderLeaderboard(leaderboard);
+      break;
+    case "leaderboard_add":
+      if (data.version <= leaderboardVersion) break;
+      if (data.version !== leaderboardVersion + 1) {
+        // Missed an update: resync from the full board.
+        send({ type: "get_leaderboard" });
+        break;
+      }
+      leaderboardVersion = data.version;
+      leaderboard.splice(data.rank, 0, data.entry);
+      leaderboard.length = Math.min(leaderboard.length, TOP_N);
+      renderLeaderboard(leaderboard);
+      break;
+    case "error":
+      setPrompt(data.text);
+      break;
+  }
+}
+
 // ── Button handlers ──────────────────────────────────────
 
 startBtn.addEventListener("click", () => {
@@ -19,13 +19,20 @@ except ImportError:
 # 16 pads: MIDI notes 31–46 (StarryPad)
 NOTE_MIN, NOTE_MAX = 31, 46
 PLAYABLE_NOTES = list(range(NOTE_MIN, NOTE_MAX + 1))
+# Flat lookup over all 128 MIDI notes: pad index 0–15, or None off the grid.
+_NOTE_TO_IDX: list[int | None] = [None] * 128
+for _i, _n in enumerate(PLAYABLE_NOTES):
+    _NOTE_TO_IDX[_n] = _i
+
+# Messages are only serialized on send, so one cached instance per note is reused.
+NOTE_ON = {n: mido.Message("note_on", note=n, velocity=127) for n in PLAYABLE_NOTES}
+NOTE_OFF = {n: mido.Message("note_off", note=n) for n in PLAYABLE_NOTES}
+NOTE_ON0 = {n: mido.Message("note_on", note=n, velocity=0) for n in PLAYABLE_NOTES}
 
 
 def note_to_pad_index(note: int) -> int | None:
     """Convert MIDI note to pad index 0–15, or None if out of range."""
-    if NOTE_MIN <= note <= NOTE_MAX:
-        return note - NOTE_MIN
-    return None
+    return _NOTE_TO_IDX[note] if 0 <= note < 128 else None
 
 
 def pad_index_to_note(index: int) -> int:
@@ -46,11 +53,11 @@ def find_starrypad_ports(port_name_filter: str | None = None):
 def light_pad(outport: mido.ports.BaseOutput | None, note: int, duration_s: float = 0.45):
     """Send note_on, wait, note_off. Also try note_on(velocity=0) for devices that use it as light off."""
     if outport:
-        outport.send(mido.Message("note_on", note=note, velocity=127))
+        outport.send(NOTE_ON[note])
     time.sleep(duration_s)
     if outport:
-        outport.send(mido.Message("note_off", note=note))
-        outport.send(mido.Message("note_on", note=note, velocity=0))
+        outport.send(NOTE_OFF[note])
+        outport.send(NOTE_ON0[note])
     time.sleep(0.25)
 
 
@@ -61,7 +68,7 @@ def run_pad_test(inport: mido.ports.BaseInput):
     try:
         for msg in inport:
             if msg.type == "note_on" and msg.velocity > 0:
-                idx = note_to_pad_index(msg.note)
+                idx = _NOTE_TO_IDX[msg.note]
                 extra = f" -> pad index {idx}" if idx is not None else ""
                 print(f"  note={msg.note} velocity={msg.velocity}{extra}")
     except KeyboardInterrupt:
@@ -76,7 +83,7 @@ def play_sequence(
 ):
     """Play the sequence: light each pad in order; on_step(pad_1based, note) called per step."""
     for note in sequence:
-        idx = note_to_pad_index(note)
+        idx = _NOTE_TO_IDX[note]
         if on_step and idx is not None:
             on_step(idx + 1, note)
         light_pad(outport, note)
@@ -129,7 +136,7 @@ def run_game(inport: mido.ports.BaseInput, outport: mido.ports.BaseOutput | None
                 if msg.type != "note_on" or msg.velocity == 0:
                     continue
                 note = msg.note
-                idx = note_to_pad_index(note)
+                idx = _NOTE_TO_IDX[note]
                 if idx is None:
                     continue
 
@@ -152,11 +159,11 @@ def run_game(inport: mido.ports.BaseInput, outport: mido.ports.BaseOutput | None
 
                 # User input during input phase
                 if outport:
-                    outport.send(mido.Message("note_on", note=note, velocity=127))
+                    outport.send(NOTE_ON[note])
                 time.sleep(0.15)
                 if outport:
-                    outport.send(mido.Message("note_off", note=note))
-                    outport.send(mido.Message("note_on", note=note, velocity=0))
+                    outport.send(NOTE_OFF[note])
+                    outport.send(NOTE_ON0[note])
 
                 if note != sequence[expected_index]:
                     game_over(received_note=note)
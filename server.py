@@ -6,12 +6,14 @@ Then open http://localhost:8765 in a browser.
 """
 
 import asyncio
-import json
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+import gzip
+import mimetypes
+import os
 import random
-import threading
 import time
 from pathlib import Path
-from queue import Empty, Queue
 
 try:
     import mido
@@ -19,36 +21,106 @@ except ImportError:
     print("Missing dependency: run  pip install mido python-rtmidi")
     exit(1)
 
+try:
+    import orjson
+except ImportError:
+    print("Missing dependency: run  pip install orjson")
+    exit(1)
+
 try:
     from aiohttp import web
 except ImportError:
     print("Missing dependency: run  pip install aiohttp")
     exit(1)
 
+try:
+    import uvloop  # optional: faster event loop, not available on Windows
+except ImportError:
+    uvloop = None
+
 NOTE_MIN, NOTE_MAX = 31, 46
 PLAYABLE_NOTES = list(range(NOTE_MIN, NOTE_MAX + 1))
+# Flat lookup over all 128 MIDI notes: pad index 0–15, or None off the grid.
+_NOTE_TO_IDX: list[int | None] = [None] * 128
+for _i, _n in enumerate(PLAYABLE_NOTES):
+    _NOTE_TO_IDX[_n] = _i
 DEBOUNCE_S = 0.35
+LIGHT_S = 0.45  # how long a pad stays lit during playback
+STEP_S = 0.70  # playback interval between pad onsets
 WEB_PORT = 8765
 STATIC_DIR = Path(__file__).resolve().parent
 LEADERBOARD_FILE = STATIC_DIR / "leaderboard.json"
 TOP_N = 5
+STATIC_FILES = {"/": "index.html", "/main.js": "main.js", "/styles.css": "styles.css"}
+CLIENT_QUEUE_SIZE = 256
+WS_WRITER_LIMIT = 2**18  # bytes buffered before send_bytes waits for the socket to drain
+DROP_LOG_EVERY = 100  # log a warning every this many dropped client messages
+
+# Hot-path events are serialized once at import; the game emits these
+# bytes as-is instead of building and encoding a dict per event.
+LIGHT_JSON = [orjson.dumps({"type": "light", "pad": i}) for i in range(len(PLAYABLE_NOTES))]
+UNLIGHT_JSON = [orjson.dumps({"type": "unlight", "pad": i}) for i in range(len(PLAYABLE_NOTES))]
+PHASE_JSON = {
+    p: orjson.dumps({"type": "phase", "phase": p}) for p in ("idle", "playing", "input", "gameover")
+}
 
 
 # ── Leaderboard persistence ──────────────────────────────────────────
 
+# (mtime_ns, sorted board) of the last file read; callers must not mutate the list.
+_lb_cache: tuple[int, list[dict]] = (0, [])
+# Bumped whenever the cached board changes; clients use it to spot missed deltas.
+_lb_version = 0
+# All leaderboard file access runs on this one thread, so a submit's
+# read-modify-write can't interleave with another read or write.
+_lb_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="leaderboard")
+
+
+async def run_leaderboard_io(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_lb_executor, fn, *args)
+
+
 def load_leaderboard() -> list[dict]:
-    if LEADERBOARD_FILE.exists():
-        try:
-            data = json.loads(LEADERBOARD_FILE.read_text())
-            if isinstance(data, list):
-                return sorted(data, key=lambda e: e.get("score", 0), reverse=True)[:TOP_N]
-        except (json.JSONDecodeError, OSError):
-            pass
-    return []
+    global _lb_cache, _lb_version
+    try:
+        mtime = LEADERBOARD_FILE.stat().st_mtime_ns
+    except OSError:
+        return []
+    if mtime == _lb_cache[0]:
+        return _lb_cache[1]
+    try:
+        data = orjson.loads(LEADERBOARD_FILE.read_bytes())
+    except (orjson.JSONDecodeError, OSError):
+        return []
+    if not isinstance(data, list):
+        return []
+    board = sorted(data, key=lambda e: e.get("score", 0), reverse=True)[:TOP_N]
+    _lb_cache = (mtime, board)
+    _lb_version += 1
+    return board
 
 
 def save_leaderboard(board: list[dict]):
-    LEADERBOARD_FILE.write_text(json.dumps(board, indent=2))
+    global _lb_cache, _lb_version
+    # Write a sibling file and swap it in, so readers never see a partial board.
+    tmp = LEADERBOARD_FILE.with_suffix(".json.tmp")
+    tmp.write_bytes(orjson.dumps(board, option=orjson.OPT_INDENT_2))
+    os.replace(tmp, LEADERBOARD_FILE)
+    try:
+        _lb_cache = (LEADERBOARD_FILE.stat().st_mtime_ns, board)
+    except OSError:
+        _lb_cache = (0, [])
+    _lb_version += 1
+
+
+def leaderboard_state() -> tuple[int, list[dict]]:
+    """Return (version, board) as one consistent pair."""
+    board = load_leaderboard()
+    return _lb_version, board
+
+
+def leaderboard_message(version: int, board: list[dict]) -> bytes:
+    return orjson.dumps({"type": "leaderboard", "board": board, "version": version})
 
 
 def is_top_score(score: int) -> bool:
@@ -58,20 +130,37 @@ def is_top_score(score: int) -> bool:
     return score > board[-1].get("score", 0)
 
 
-def add_score(name: str, score: int) -> list[dict]:
-    board = load_leaderboard()
-    board.append({"name": name, "score": score})
+def add_score(name: str, score: int) -> tuple[list[dict], int | None, int]:
+    """Insert a score; return (board, entry's rank or None if it didn't place, board version)."""
+    entry = {"name": name, "score": score}
+    board = [*load_leaderboard(), entry]
     board = sorted(board, key=lambda e: e["score"], reverse=True)[:TOP_N]
-    save_leaderboard(board)
-    return board
+    rank = next((i for i, e in enumerate(board) if e is entry), None)
+    if rank is not None:
+        save_leaderboard(board)
+    return board, rank, _lb_version
 
 
 # ── MIDI helpers ──────────────────────────────────────────────────────
 
 def note_to_pad_index(note: int) -> int | None:
-    if NOTE_MIN <= note <= NOTE_MAX:
-        return note - NOTE_MIN
-    return None
+    return _NOTE_TO_IDX[note] if 0 <= note < 128 else None
+
+
+# Some StarryPad firmware only clears a pad LED on note_on velocity 0, so by
+# default both off messages are sent; set False for devices that honour note_off.
+OFF_NEEDS_VELOCITY_0 = True
+
+# Prebuilt per-note messages so lighting a pad doesn't construct Message objects.
+NOTE_ON_MSG = {n: mido.Message("note_on", note=n, velocity=127) for n in PLAYABLE_NOTES}
+_OFF_MSGS = {
+    n: (mido.Message("note_off", note=n), mido.Message("note_on", note=n, velocity=0))
+    if OFF_NEEDS_VELOCITY_0
+    else (mido.Message("note_off", note=n),)
+    for n in PLAYABLE_NOTES
+}
+# The same off messages as raw bytes (channel 1), for sending through rtmidi directly.
+_OFF_BYTES = {n: tuple(bytes(m.bin()) for m in msgs) for n, msgs in _OFF_MSGS.items()}
 
 
 def find_starrypad_ports():
@@ -83,43 +172,68 @@ def find_starrypad_ports():
     return in_name, out_name
 
 
-# ── Game thread ───────────────────────────────────────────────────────
+# ── Game ──────────────────────────────────────────────────────────────
 
-def game_thread(game_events: Queue, ui_to_game: Queue):
+async def start_game(app):
+    """on_startup hook: set up game state on the server loop and expose app["game_command"]."""
+    loop = asyncio.get_running_loop()
     inport = None
     outport = None
+    raw_out = None  # python-rtmidi MidiOut behind outport, when the backend exposes it
 
     sequence: list[int] = []
     score = 0
     phase = "idle"  # idle | playing | input | gameover
-    expected_index = 0
     last_note = None
     last_note_time = 0.0
-    stop_requested = False
     midi_ok = False
+    game_task: asyncio.Task | None = None
+    pending: list[bytes] = []
+    pending_droppable = True
+    # Pad presses arrive on the rtmidi callback thread and are handed to the loop.
+    note_q: asyncio.Queue = asyncio.Queue(maxsize=64)
+    # MIDI output goes to one worker so sends stay ordered and never block the loop.
+    midi_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="midi-out")
+
+    def queue_note(note: int):
+        try:
+            note_q.put_nowait(note)
+        except asyncio.QueueFull:
+            pass
 
-    def emit(ev):
-        game_events.put(ev)
-
-    def drain_commands() -> str | None:
-        cmd = None
-        while True:
-            try:
-                cmd = ui_to_game.get_nowait()
-            except Empty:
-                break
-        return cmd
+    def on_midi(msg):
+        if msg.type == "note_on" and msg.velocity > 0:
+            loop.call_soon_threadsafe(queue_note, msg.note)
+
+    def flush_events():
+        nonlocal pending_droppable
+        # Everything emitted in one loop iteration goes out as a single frame.
+        batch = pending[:]
+        pending.clear()
+        broadcast(app, b'{"type":"batch","events":[' + b",".join(batch) + b"]}", pending_droppable)
+        pending_droppable = True
+
+    def emit(ev: bytes | dict, droppable: bool = False):
+        """Queue an event for the next batch; droppable events may be shed for slow clients."""
+        nonlocal pending_droppable
+        if not isinstance(ev, bytes):
+            ev = orjson.dumps(ev)
+        if not pending:
+            loop.call_soon(flush_events)
+        pending.append(ev)
+        pending_droppable = pending_droppable and droppable
 
     def try_connect_midi() -> bool:
-        nonlocal inport, outport, midi_ok
+        nonlocal inport, outport, raw_out, midi_ok
         if midi_ok:
             return True
         try:
             in_name, out_name = find_starrypad_ports()
             if not in_name:
                 return False
-            inport = mido.open_input(in_name)
+            inport = mido.open_input(in_name, callback=on_midi)
             outport = mido.open_output(out_name) if out_name else None
+            raw_out = getattr(outport, "_rt", None)
             midi_ok = True
             print(f"StarryPad connected: {in_name}")
             return True
@@ -127,237 +241,322 @@ def game_thread(game_events: Queue, ui_to_game: Queue):
             print(f"MIDI connect failed: {e}")
             return False
 
-    def light_pad(note: int, duration_s: float = 0.45):
-        idx = note_to_pad_index(note)
-        if idx is not None:
-            emit({"type": "light", "pad": idx})
+    def pad_led_on(note: int):
         if outport:
             try:
-                outport.send(mido.Message("note_on", note=note, velocity=127))
+                outport.send(NOTE_ON_MSG[note])
             except Exception:
                 pass
-        time.sleep(duration_s)
-        if outport:
+
+    def pad_led_off(note: int):
+        if not outport:
+            return
+        try:
+            # Skip mido's per-message validation on the hot path when rtmidi is reachable.
+            if raw_out is not None:
+                for b in _OFF_BYTES[note]:
+                    raw_out.send_message(b)
+            else:
+                for m in _OFF_MSGS[note]:
+                    outport.send(m)
+        except Exception:
+            pass
+
+    def send_midi(fn, note: int):
+        loop.run_in_executor(midi_executor, fn, note)
+
+    async def play_sequence(seq: list[int]):
+        # Onsets are timed from one base, so a late wake-up doesn't push the rest back.
+        base = loop.time()
+        for i, note in enumerate(seq):
+            idx = _NOTE_TO_IDX[note]
+            await asyncio.sleep(base + i * STEP_S - loop.time())
+            emit(LIGHT_JSON[idx], droppable=True)
+            send_midi(pad_led_on, note)
             try:
-                outport.send(mido.Message("note_off", note=note))
-                outport.send(mido.Message("note_on", note=note, velocity=0))
-            except Exception:
-                pass
-        if idx is not None:
-            emit({"type": "unlight", "pad": idx})
-        time.sleep(0.25)
+                await asyncio.sleep(base + i * STEP_S + LIGHT_S - loop.time())
+            finally:
+                emit(UNLIGHT_JSON[idx], droppable=True)
+                send_midi(pad_led_off, note)
+        await asyncio.sleep(base + len(seq) * STEP_S - loop.time())
+
+    async def read_sequence() -> bool:
+        """Wait for the player to repeat the sequence; False on the first wrong pad."""
+        nonlocal last_note, last_note_time
+        expected_index = 0
+        while expected_index < len(sequence):
+            note = await note_q.get()
+            idx = _NOTE_TO_IDX[note]
+            if idx is None:
+                continue
+
+            now = time.time()
+            if last_note == note and (now - last_note_time) < DEBOUNCE_S:
+                continue
+            last_note = note
+            last_note_time = now
+
+            send_midi(pad_led_on, note)
+            try:
+                await asyncio.sleep(0.15)
+            finally:
+                send_midi(pad_led_off, note)
+
+            if note != sequence[expected_index]:
+                emit({"type": "wrong", "pad": idx})
+                return False
 
-    def go_idle():
-        nonlocal phase, sequence, score, stop_requested
+            emit({"type": "correct", "pad": idx})
+            expected_index += 1
+        return True
+
+    async def go_idle():
+        nonlocal phase, sequence, score
         phase = "idle"
         sequence = []
         score = 0
-        stop_requested = False
-        emit({"type": "phase", "phase": "idle"})
+        emit(PHASE_JSON["idle"])
         emit({"type": "score", "score": 0})
-        emit({"type": "leaderboard", "board": load_leaderboard()})
-
-    def start_round():
-        nonlocal sequence, score, phase, expected_index, stop_requested
-        sequence.append(random.choice(PLAYABLE_NOTES))
-        score = len(sequence) - 1
-        phase = "playing"
-        expected_index = 0
-        emit({"type": "score", "score": score})
-        emit({"type": "phase", "phase": "playing"})
-        for note in sequence:
-            cmd = drain_commands()
-            if cmd == "stop":
-                stop_requested = True
-                go_idle()
-                return
-            light_pad(note)
-        cmd = drain_commands()
-        if cmd == "stop":
-            go_idle()
-            return
-        phase = "input"
-        expected_index = 0
-        emit({"type": "phase", "phase": "input"})
+        emit(leaderboard_message(*await run_leaderboard_io(leaderboard_state)))
 
-    def game_over():
+    async def game_over():
         nonlocal phase
         final_score = score
         phase = "gameover"
-        emit({"type": "phase", "phase": "gameover"})
-        top = is_top_score(final_score)
+        emit(PHASE_JSON["gameover"])
+        top = await run_leaderboard_io(is_top_score, final_score)
         emit({"type": "gameover", "score": final_score, "is_top5": top})
 
-    # Try to connect on startup
-    try_connect_midi()
-    go_idle()
-
-    try:
-        while True:
-            cmd = drain_commands()
-
-            if cmd == "stop" and phase not in ("idle",):
-                go_idle()
-                continue
-
-            if cmd == "start" and phase in ("idle", "gameover"):
-                if not midi_ok:
-                    try_connect_midi()
-                if not midi_ok:
-                    emit({"type": "error", "text": "No StarryPad found. Connect it and try again."})
-                    go_idle()
-                    continue
-                stop_requested = False
-                sequence = []
-                score = 0
-                start_round()
-                if phase == "idle":
-                    continue
-
-            if phase in ("idle", "gameover"):
-                time.sleep(0.05)
-                continue
-
-            if not inport:
-                time.sleep(0.05)
-                continue
-
-            for msg in inport.iter_pending():
-                if msg.type != "note_on" or msg.velocity == 0:
-                    continue
-                note = msg.note
-                idx = note_to_pad_index(note)
-                if idx is None:
-                    continue
-
-                if phase != "input":
-                    continue
-
-                now = time.time()
-                if last_note == note and (now - last_note_time) < DEBOUNCE_S:
-                    continue
-                last_note = note
-                last_note_time = now
-
-                if outport:
-                    try:
-                        outport.send(mido.Message("note_on", note=note, velocity=127))
-                    except Exception:
-                        pass
-                time.sleep(0.15)
-                if outport:
-                    try:
-                        outport.send(mido.Message("note_off", note=note))
-                        outport.send(mido.Message("note_on", note=note, velocity=0))
-                    except Exception:
-                        pass
-
-                if note != sequence[expected_index]:
-                    emit({"type": "wrong", "pad": idx})
-                    game_over()
-                    continue
-
-                emit({"type": "correct", "pad": idx})
-                expected_index += 1
-                if expected_index >= len(sequence):
-                    time.sleep(0.8)
-                    start_round()
-                    if phase == "idle":
-                        break
-            time.sleep(0.05)
-    except Exception as e:
-        emit({"type": "error", "text": f"Error: {e}"})
-    finally:
+    async def run_game():
+        nonlocal sequence, score, phase
+        if not midi_ok:
+            await asyncio.to_thread(try_connect_midi)
+        if not midi_ok:
+            emit({"type": "error", "text": "No StarryPad found. Connect it and try again."})
+            await go_idle()
+            return
+        sequence = []
+        try:
+            while True:
+                sequence.append(random.choice(PLAYABLE_NOTES))
+                score = len(sequence) - 1
+                phase = "playing"
+                emit({"type": "score", "score": score})
+                emit(PHASE_JSON["playing"])
+                await play_sequence(sequence)
+                phase = "input"
+                emit(PHASE_JSON["input"])
+                if not await read_sequence():
+                    await game_over()
+                    return
+                await asyncio.sleep(0.8)
+        except Exception as e:
+            emit({"type": "error", "text": f"Error: {e}"})
+
+    async def game_command(cmd: str):
+        nonlocal game_task
+        running = game_task is not None and not game_task.done()
+        if cmd == "stop" and phase != "idle":
+            if running:
+                game_task.cancel()
+            await go_idle()
+        elif cmd == "start" and not running and phase in ("idle", "gameover"):
+            game_task = asyncio.create_task(run_game())
+
+    async def stop_game(_app):
+        # Let the cancelled game run its finally blocks (pad-off sends) before
+        # the executor and ports go away, then flush those sends.
+        if game_task is not None:
+            game_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await game_task
+        await asyncio.to_thread(midi_executor.shutdown)
         if inport:
             inport.close()
         if outport:
             outport.close()
 
+    app["game_command"] = game_command
+    app.on_cleanup.append(stop_game)
+
+    # Try to connect on startup
+    await asyncio.to_thread(try_connect_midi)
+    await go_idle()
+
 
 # ── Web server ────────────────────────────────────────────────────────
 
 async def websocket_handler(request):
-    ws = web.WebSocketResponse()
+    # Game events are a few dozen bytes; permessage-deflate costs more than it saves.
+    ws = web.WebSocketResponse(compress=False, writer_limit=WS_WRITER_LIMIT)
     await ws.prepare(request)
-    request.app["clients"].add(ws)
+    out_q: asyncio.Queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+    writer = asyncio.create_task(client_writer(request.app, ws, out_q))
+    request.app["clients"][ws] = out_q
+    refresh_clients_snapshot(request.app)
 
     # Send current leaderboard on connect
-    board = load_leaderboard()
-    await ws.send_str(json.dumps({"type": "leaderboard", "board": board}))
+    out_q.put_nowait((leaderboard_message(*await run_leaderboard_io(leaderboard_state)), False))
 
     try:
         async for msg in ws:
             if msg.type != web.WSMsgType.TEXT:
                 continue
             try:
-                data = json.loads(msg.data)
-            except json.JSONDecodeError:
+                data = orjson.loads(msg.data)
+            except orjson.JSONDecodeError:
                 continue
             cmd = data.get("type")
-            if cmd == "start":
-                request.app["ui_to_game"].put("start")
-            elif cmd == "stop":
-                request.app["ui_to_game"].put("stop")
+            if cmd in ("start", "stop"):
+                await request.app["game_command"](cmd)
             elif cmd == "submit_name":
                 name = str(data.get("name", "")).strip()[:20]
                 score = data.get("score", 0)
                 if name and isinstance(score, int) and score > 0:
-                    board = add_score(name, score)
-                    payload = json.dumps({"type": "leaderboard", "board": board})
-                    for c in set(request.app["clients"]):
-                        try:
-                            await c.send_str(payload)
-                        except Exception:
-                            request.app["clients"].discard(c)
+                    _, rank, version = await run_leaderboard_io(add_score, name, score)
+                    if rank is not None:
+                        # Clients splice the entry into their copy of the board and
+                        # ask for the full board if the version shows a gap.
+                        entry = {"name": name, "score": score}
+                        delta = {"type": "leaderboard_add", "entry": entry, "rank": rank}
+                        broadcast(request.app, orjson.dumps({**delta, "version": version}))
+            elif cmd == "get_leaderboard":
+                msg = leaderboard_message(*await run_leaderboard_io(leaderboard_state))
+                enqueue(request.app, out_q, msg)
     finally:
-        request.app["clients"].discard(ws)
+        request.app["clients"].pop(ws, None)
+        refresh_clients_snapshot(request.app)
+        writer.cancel()
     return ws
 
 
-async def broadcast(app, payload: dict):
-    msg = json.dumps(payload)
-    for ws in set(app["clients"]):
+async def client_writer(app, ws: web.WebSocketResponse, out_q: asyncio.Queue):
+    """Send queued messages to one client so a slow socket only delays itself."""
+    while True:
+        msg, _ = await out_q.get()
         try:
-            await ws.send_str(msg)
+            await ws.send_bytes(msg)
         except Exception:
-            app["clients"].discard(ws)
+            break
+    # The socket is dead: stop broadcasting to it and end the handler's receive loop.
+    app["clients"].pop(ws, None)
+    refresh_clients_snapshot(app)
+    try:
+        await ws.close()
+    except Exception:
+        pass
 
 
-async def game_event_forwarder(app):
-    q = app["game_events"]
-    while True:
-        try:
-            ev = q.get_nowait()
-        except Empty:
-            await asyncio.sleep(0.02)
-            continue
-        await broadcast(app, ev)
+def refresh_clients_snapshot(app):
+    """Rebuild the tuple broadcast() iterates; only called on connect/disconnect."""
+    app["client_state"]["snapshot"] = tuple(app["clients"].values())
+
+
+def make_room(app, out_q: asyncio.Queue, droppable: bool) -> bool:
+    """Shed one message for a full client queue; return False if the incoming one is shed.
+
+    The oldest queued droppable message goes first, then a droppable incoming one.
+    Only when neither exists is the oldest important message lost.
+    """
+    state = app["client_state"]
+    items = [out_q.get_nowait() for _ in range(out_q.qsize())]
+    victim = next((i for i, (_, d) in enumerate(items) if d), None)
+    keep_incoming = True
+    if victim is not None:
+        del items[victim]
+    elif droppable:
+        keep_incoming = False
+    else:
+        del items[0]
+        state["important_dropped"] += 1
+        if state["important_dropped"] % DROP_LOG_EVERY == 1:
+            print(
+                f"Slow WebSocket client: {state['important_dropped']} "
+                "score/phase/leaderboard messages dropped so far"
+            )
+    for item in items:
+        out_q.put_nowait(item)
+    state["dropped"] += 1
+    if state["dropped"] % DROP_LOG_EVERY == 1:
+        print(f"Slow WebSocket client: {state['dropped']} messages dropped so far")
+    return keep_incoming
+
+
+def enqueue(app, out_q: asyncio.Queue, msg: bytes, droppable: bool = False):
+    if out_q.full() and not make_room(app, out_q, droppable):
+        return
+    out_q.put_nowait((msg, droppable))
+
+
+def broadcast(app, msg: bytes, droppable: bool = False):
+    for out_q in app["client_state"]["snapshot"]:
+        enqueue(app, out_q, msg, droppable)
+
+
+def load_static_files() -> dict[str, tuple[bytes, bytes, str]]:
+    """Read the UI files once: path -> (raw, gzipped, content type)."""
+    files = {}
+    for path, name in STATIC_FILES.items():
+        raw = (STATIC_DIR / name).read_bytes()
+        content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        files[path] = (raw, gzip.compress(raw, 6), content_type)
+    return files
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """True if an Accept-Encoding header allows gzip (explicitly or via *) with q > 0."""
+    qualities = {}
+    for token in accept_encoding.split(","):
+        coding, *params = token.split(";")
+        q = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key.lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[coding.strip().lower()] = q
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+
+async def static_handler(request):
+    raw, gz, content_type = request.app["static_files"][request.path]
+    headers = {
+        "Content-Type": content_type,
+        "Cache-Control": "public, max-age=3600",
+        "Vary": "Accept-Encoding",
+    }
+    if accepts_gzip(request.headers.get("Accept-Encoding", "")):
+        headers["Content-Encoding"] = "gzip"
+        return web.Response(body=gz, headers=headers)
+    return web.Response(body=raw, headers=headers)
 
 
 def create_app():
     app = web.Application()
-    app["game_events"] = Queue()
-    app["ui_to_game"] = Queue()
-    app["clients"] = set()
+    app["clients"] = {}  # ws -> queue of (message, droppable)
+    # Mutable holder for state rebound after startup; the app itself is frozen then.
+    app["client_state"] = {"snapshot": (), "dropped": 0, "important_dropped": 0}
+
+    app["static_files"] = load_static_files()
 
-    app.router.add_get("/", lambda r: web.FileResponse(STATIC_DIR / "index.html"))
-    app.router.add_get("/main.js", lambda r: web.FileResponse(STATIC_DIR / "main.js"))
-    app.router.add_get("/styles.css", lambda r: web.FileResponse(STATIC_DIR / "styles.css"))
+    for path in STATIC_FILES:
+        app.router.add_get(path, static_handler)
     app.router.add_get("/ws", websocket_handler)
+    app.on_startup.append(start_game)
 
     return app
 
 
 def main():
+    loop = uvloop.new_event_loop() if uvloop else asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
     app = create_app()
     runner = web.AppRunner(app)
-    threading.Thread(target=game_thread, args=(app["game_events"], app["ui_to_game"]), daemon=True).start()
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
     loop.run_until_complete(runner.setup())
     site = web.TCPSite(runner, "0.0.0.0", WEB_PORT)
     loop.run_until_complete(site.start())
-    loop.create_task(game_event_forwarder(app))
     print(f"StarryPad Simon Says – open http://localhost:{WEB_PORT}")
     try:
         loop.run_forever()